@@ -46,6 +46,24 @@ from playwright.async_api import async_playwright
 import httpx
 from dotenv import load_dotenv
 
+# orjson parses/serializes the large session & cookie blobs several times
+# faster than stdlib json; fall back silently when it isn't installed.
+try:
+    import orjson
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> str:
+        # Compact separators: session blobs are machine-read only, so skip
+        # the default whitespace padding (smaller files, fewer bytes parsed).
+        return json.dumps(obj, separators=(",", ":"))
+
 # Load configuration from .env file
 load_dotenv()
 
@@ -69,8 +87,15 @@ PLATFORMS = {
     "stage": ("stage.in", "session_stage.json")
 }
 
+# Parsed users.json, keyed on the file's mtime so manual edits still land
+_users_cache = None
+
 def load_users():
+    global _users_cache
     if os.path.exists(USERS_FILE):
+        mtime = os.path.getmtime(USERS_FILE)
+        if _users_cache and _users_cache[0] == mtime:
+            return _users_cache[1]
         data = json.load(open(USERS_FILE))
         # MIGRATION: Convert list of premium IDs to dict with default expiry
         if isinstance(data.get("premium"), list):
@@ -80,24 +105,31 @@ def load_users():
                 new_premium[str(uid)] = time.time() + (30 * 86400)
             data["premium"] = new_premium
             save_users(data)
+        else:
+            _users_cache = (mtime, data)
         return data
     return {"authorized": [], "premium": {}}
 
 def save_users(data):
+    global _users_cache
     with open(USERS_FILE, "w") as f:
         json.dump(data, f, indent=2)
+    _users_cache = (os.path.getmtime(USERS_FILE), data)
 
 # --- ADMIN LIST ---
-ADMIN_IDS = [OWNER_ID, 6796307271]
+ADMIN_IDS = frozenset({OWNER_ID, 6796307271})
 
-def is_authorized(uid):
+def is_authorized(uid, users=None):
     if uid in ADMIN_IDS: return True
-    users = load_users()
-    return uid in users["authorized"] or uid in users["premium"]
+    if users is None:
+        users = load_users()
+    # premium is keyed by str since the expiry migration
+    return uid in users["authorized"] or str(uid) in users["premium"]
 
-def is_premium(uid):
+def is_premium(uid, users=None):
     if uid in ADMIN_IDS: return True
-    users = load_users()
+    if users is None:
+        users = load_users()
     s_uid = str(uid)
     if s_uid in users["premium"]:
         expiry = users["premium"][s_uid]
@@ -137,6 +169,33 @@ QUALITIES = {
 #  HELPERS
 # ============================================================
 
+# Hot-path regexes, compiled once at import so per-segment/per-line calls
+# skip the re module's cache lookup.
+_URI_RE = re.compile(r'URI="([^"]+)"')
+_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^",]*)')
+_TITLE_PREFIX_RE = re.compile(r'^(?:Watch|Online|Free|Download)\s+', re.I)
+_TITLE_SUFFIX_RE = re.compile(r'\s*[-|]\s*(?:Stage|Watch|Online|Free|HD).*', re.I)
+_TITLE_YEAR_RE = re.compile(r'\((20\d\d)\)')
+_BODY_YEAR_RE = re.compile(r'\b(20[12]\d)\b')
+_FILENAME_SAFE_RE = re.compile(r'[\\/:*?"<>|]')
+_SLUG_SAFE_RE = re.compile(r"[^\w\-]")
+_WATCH_REWRITE_RE = re.compile(r"/(movie|show|episode)/(.+)$")
+_EP_SUFFIX_RE = re.compile(r"\s*\|\s*Episode\s*\d+", re.I)
+# Batch suffixes: /start-end or /season-start-end — one scan covers both
+_BATCH_RE = re.compile(r"/(\d+)-(\d+)(?:-(\d+))?$")
+
+# Language detection: one alternation scan of the URL instead of one
+# substring pass per language.
+_LANG_MAP = {
+    "marathi": ("Marathi", "Mar"), "hindi": ("Hindi", "Hin"),
+    "haryanvi": ("Haryanvi", "Har"), "rajasthani": ("Rajasthani", "Raj"),
+    "gujarati": ("Gujarati", "Guj"), "punjabi": ("Punjabi", "Pun"),
+    "tamil": ("Tamil", "Tam"), "telugu": ("Telugu", "Tel"),
+    "kannada": ("Kannada", "Kan"), "bengali": ("Bengali", "Ben"),
+    "malayalam": ("Malayalam", "Mal"), "bhojpuri": ("Bhojpuri", "Bho"),
+}
+_LANG_RE = re.compile("|".join(_LANG_MAP), re.I)
+
 async def fetch(url: str, client: httpx.AsyncClient) -> bytes:
     try:
         r = await client.get(url, headers=HEADERS, timeout=30)
@@ -157,12 +216,28 @@ def base_of(url: str) -> str:
 def qs_of(url: str) -> str:
     return urlparse(url).query
 
+def watch_slug(url: str) -> str | None:
+    """Pull the slug after /watch/ — plain partition, no regex needed."""
+    slug = url.partition("/watch/")[2].partition("?")[0]
+    return slug or None
+
 def absolute(rel: str, base: str, qs: str) -> str:
     if rel.startswith("http"):
         return rel if "?" in rel or not qs else f"{rel}?{qs}"
     full = f"{base}/{rel}"
     return f"{full}?{qs}" if qs else full
 
+# Scraped titles land inside legacy-Markdown messages; escape the specials
+# in one C-level translate pass so a stray _ or * can't break the parse.
+_MD_ESCAPE = str.maketrans({c: "\\" + c for c in "_*[`"})
+
+def md_escape(text: str) -> str:
+    return text.translate(_MD_ESCAPE)
+
+def parse_attrs(line: str) -> dict:
+    """Parse an #EXT-X tag's attribute list into a dict in one pass."""
+    return {k: v[1:-1] if v.startswith('"') else v for k, v in _ATTR_RE.findall(line)}
+
 def progress_bar(pct: float, width: int = 20) -> str:
     """Generate a sleek progress bar with emoji blocks."""
     pct = max(0, min(100, pct))
@@ -230,14 +305,14 @@ def get_session_path(platform: str) -> str:
 
 def save_session(state: dict, platform: str = "stage"):
     with open(get_session_path(platform), "w") as f:
-        json.dump(state, f)
+        f.write(_dumps(state))
 
 def load_session(platform: str = "stage") -> dict | None:
     path = get_session_path(platform)
     if not os.path.exists(path):
         return None
     with open(path) as f:
-        data = json.load(f)
+        data = _loads(f.read())
     
     # Bug fix: if the session was saved as a flat list of cookies, wrap it in a dict
     if isinstance(data, list):
@@ -264,6 +339,16 @@ def has_session(platform: str = "stage") -> bool:
 #  SCRAPER — headless Chromium, fast m3u8 capture
 # ============================================================
 
+# Default metadata schema — copied per scrape so the keys live in one place
+META_DEFAULTS = {
+    "title": "Video", "year": "", "lang": "", "lang_full": "",
+    "poster": "", "description": "", "info": "", "platform": "STAGE",
+}
+
+# Resource types the scraper aborts to speed up page loads
+BLOCK_TYPES = {"image", "stylesheet", "font"}
+LOGIN_BLOCK_TYPES = {"image", "font"}
+
 # Resolution -> label map
 RES_LABELS = {
     "3840x2160": "2160p", "2560x1440": "1440p", "1920x1080": "1080p",
@@ -274,9 +359,29 @@ def res_to_label(res: str) -> str:
     """Convert '1920x1080' to '1080p'."""
     if res in RES_LABELS:
         return RES_LABELS[res]
-    m = re.match(r"\d+x(\d+)", res)
-    return f"{m.group(1)}p" if m else res
-
+    w, _, h = res.partition("x")
+    return f"{h}p" if w.isdigit() and h.isdigit() else res
+
+
+# Scrape results are cached briefly so the same link posted by several users
+# doesn't relaunch the browser each time. The TTL stays short because the
+# captured m3u8 URLs carry signed tokens that expire.
+SCRAPE_TTL = 300
+_scrape_cache = {}
+
+# One Chromium instance stays warm across scrapes — launching the browser
+# dominates scrape latency, so only a fresh context (with the saved session)
+# is created per request.
+_pw = None
+_browser = None
+
+async def get_browser():
+    global _pw, _browser
+    if _browser is None or not _browser.is_connected():
+        if _pw is None:
+            _pw = await async_playwright().start()
+        _browser = await _pw.chromium.launch(headless=True)
+    return _browser
 
 async def scrape_stage(url: str) -> tuple[str | None, dict | None, str | None]:
     """Returns (m3u8_url, metadata_dict, error_string) for Stage.in."""
@@ -284,171 +389,195 @@ async def scrape_stage(url: str) -> tuple[str | None, dict | None, str | None]:
     if not session:
         return None, None, "No session. Use /login or import cookies first."
 
-    BLOCK_TYPES = {"image", "stylesheet", "font"}
+    cached = _scrape_cache.get(url)
+    if cached and time.time() - cached[0] < SCRAPE_TTL:
+        return cached[1], dict(cached[2]), None
+
     master = None
-    meta = {"title": "Video", "year": "", "lang": "", "lang_full": "", "poster": "", "description": "", "info": "", "platform": "STAGE"}
+    meta = dict(META_DEFAULTS)
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        try:
-            ctx = await browser.new_context(storage_state=session, user_agent=UA,
-                                       viewport={"width": 1280, "height": 720})
-            
-            page = await ctx.new_page()
-            async def handle_route(route):
-                if route.request.resource_type in BLOCK_TYPES:
-                    await route.abort()
-                else:
-                    await route.continue_()
-            await page.route("**/*", handle_route)
+    browser = await get_browser()
+    ctx = await browser.new_context(storage_state=session, user_agent=UA,
+                                    viewport={"width": 1280, "height": 720})
+    try:
+        page = await ctx.new_page()
+        async def handle_route(route):
+            if route.request.resource_type in BLOCK_TYPES:
+                await route.abort()
+            else:
+                await route.continue_()
+        await page.route("**/*", handle_route)
 
-            def on_req(req):
-                nonlocal master
-                if "playlist.m3u8" in req.url and master is None:
-                    master = req.url
+        found = asyncio.Event()
 
-            page.on("request", on_req)
-            
-            try:
-                await page.goto(url, wait_until="domcontentloaded", timeout=20_000)
-                for _ in range(250): 
-                    if master: break
-                    await asyncio.sleep(0.1)
-            except Exception as e:
-                log.warning(f"stage nav: {e}")
+        def on_req(req):
+            nonlocal master
+            if "playlist.m3u8" in req.url and master is None:
+                master = req.url
+                found.set()
+
+        page.on("request", on_req)
 
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=20_000)
             try:
-                metadata = await page.evaluate("""() => {
-                    const getVal = (sel) => document.querySelector(sel)?.innerText?.strip() || '';
-                    const getAttr = (sel, attr) => document.querySelector(sel)?.getAttribute(attr) || '';
-                    return {
-                        title: getVal('h1') || getVal('[class*="title"]') || getAttr('meta[property="og:title"]', 'content') || document.title,
-                        description: getVal('p[class*="description"], [class*="synopsis"]') || getAttr('meta[name="description"]', 'content'),
-                        info: getVal('[class*="metadata"], [class*="movie-info"]'),
-                        poster: getAttr('img[class*="poster"], img[class*="thumbnail"], img[class*="banner"]', 'src') || getAttr('meta[property="og:image"]', 'content'),
-                        body_text: document.body.innerText.slice(0, 2000)
-                    };
-                }""")
-                
-                raw_title = metadata["title"]
-                # Clean title: remove "Watch", "Online", etc from start
-                raw_title = re.sub(r'^(Watch|Online|Free|Download)\s+', '', raw_title, flags=re.I).strip()
-                # Clean title: remove platform suffix
-                raw_title = re.sub(r'\s*[-|]\s*(Stage|Watch|Online|Free|HD).*', '', raw_title, flags=re.I).strip()
-                meta["title"] = raw_title
-                
-                y_match = re.search(r'\((20\d\d)\)', raw_title)
+                await asyncio.wait_for(found.wait(), timeout=25)
+            except asyncio.TimeoutError:
+                pass
+        except Exception as e:
+            log.warning(f"stage nav: {e}")
+
+        try:
+            metadata = await page.evaluate("""() => {
+                const getVal = (sel) => document.querySelector(sel)?.innerText?.trim() || '';
+                const getAttr = (sel, attr) => document.querySelector(sel)?.getAttribute(attr) || '';
+                return {
+                    title: getVal('h1') || getVal('[class*="title"]') || getAttr('meta[property="og:title"]', 'content') || document.title,
+                    description: getVal('p[class*="description"], [class*="synopsis"]') || getAttr('meta[name="description"]', 'content'),
+                    info: getVal('[class*="metadata"], [class*="movie-info"]'),
+                    poster: getAttr('img[class*="poster"], img[class*="thumbnail"], img[class*="banner"]', 'src') || getAttr('meta[property="og:image"]', 'content'),
+                    body_text: document.body.innerText.slice(0, 2000)
+                };
+            }""")
+            
+            raw_title = metadata["title"]
+            # Clean title: remove "Watch", "Online", etc from start
+            raw_title = _TITLE_PREFIX_RE.sub('', raw_title).strip()
+            # Clean title: remove platform suffix
+            raw_title = _TITLE_SUFFIX_RE.sub('', raw_title).strip()
+            meta["title"] = raw_title
+
+            y_match = _TITLE_YEAR_RE.search(raw_title)
+            if y_match:
+                meta["year"] = y_match.group(1)
+            else:
+                y_match = _BODY_YEAR_RE.search(metadata["body_text"])
                 if y_match:
-                    meta["year"] = y_match.group(1)
-                else:
-                    y_match = re.search(r'\b(20[12]\d)\b', metadata["body_text"])
-                    if y_match:
-                        y = int(y_match.group(1))
-                        if 2010 <= y <= 2026: meta["year"] = str(y)
-                
-                meta["description"] = metadata["description"][:300] + "..." if len(metadata["description"]) > 300 else metadata["description"]
-                meta["info"] = metadata["info"].replace("\n", " • ")
-                meta["poster"] = metadata["poster"] if metadata["poster"].startswith('http') else ""
-            except: pass
+                    y = int(y_match.group(1))
+                    if 2010 <= y <= 2026: meta["year"] = str(y)
+            
+            meta["description"] = metadata["description"][:300] + "..." if len(metadata["description"]) > 300 else metadata["description"]
+            meta["info"] = metadata["info"].replace("\n", " • ")
+            meta["poster"] = metadata["poster"] if metadata["poster"].startswith('http') else ""
+        except: pass
 
-            lang_map = {
-                "marathi": ("Marathi", "Mar"), "hindi": ("Hindi", "Hin"),
-                "haryanvi": ("Haryanvi", "Har"), "rajasthani": ("Rajasthani", "Raj"),
-                "gujarati": ("Gujarati", "Guj"), "punjabi": ("Punjabi", "Pun"),
-                "tamil": ("Tamil", "Tam"), "telugu": ("Telugu", "Tel"),
-                "kannada": ("Kannada", "Kan"), "bengali": ("Bengali", "Ben"),
-                "malayalam": ("Malayalam", "Mal"), "bhojpuri": ("Bhojpuri", "Bho"),
-            }
-            for key, (full, short) in lang_map.items():
-                if key in url.lower():
-                    meta["lang_full"], meta["lang"] = full, short
-                    break
+        lang_m = _LANG_RE.search(url)
+        if lang_m:
+            meta["lang_full"], meta["lang"] = _LANG_MAP[lang_m.group(0).lower()]
 
-            try:
-                if master:
-                    save_session(await ctx.storage_state(), "stage")
-            except: pass
-            
-        finally:
-            await browser.close()
+        try:
+            if master:
+                save_session(await ctx.storage_state(), "stage")
+        except: pass
+
+    finally:
+        await ctx.close()
 
     if master:
+        for k in [k for k, v in _scrape_cache.items() if time.time() - v[0] >= SCRAPE_TTL]:
+            _scrape_cache.pop(k, None)
+        _scrape_cache[url] = (time.time(), master, dict(meta))
         return master, meta, None
     return None, None, "m3u8 not found. Session expired? /login again."
 
 # Global executor for background tasks (ffmpeg, rclone, write)
 EXECUTOR = ThreadPoolExecutor(max_workers=8)
 DL_WORKERS = 10  # concurrent segment downloads
-
-async def download_segments(m3u8_url: str, fallback_qs: str, out: str, cb=None) -> bool:
-    """Async downloader for HLS segments using httpx."""
-    async with httpx.AsyncClient(headers=HEADERS, timeout=60) as client:
-        base = base_of(m3u8_url)
-        qs = qs_of(m3u8_url) or fallback_qs
-        content = await fetch_text(m3u8_url, client)
-
-        init_url = None
-        segs = []
-        for line in content.strip().split("\n"):
-            line = line.strip()
-            if line.startswith("#EXT-X-MAP"):
-                m = re.search(r'URI="([^"]+)"', line)
-                if m: init_url = absolute(m.group(1), base, qs)
-            elif line and not line.startswith("#"):
-                segs.append(absolute(line, base, qs))
-
-        total = len(segs)
-        semaphore = asyncio.Semaphore(DL_WORKERS)
-        
-        # Buffer for ordered writing
-        results = [None] * total
-        done = 0
-        total_bytes = 0
-        async def dl_one(idx, url):
-            nonlocal done, total_bytes
-            async with semaphore:
-                for attempt in range(3):
-                    try:
-                        r = await client.get(url, timeout=30)
-                        r.raise_for_status()
-                        results[idx] = r.content
-                        done += 1
-                        total_bytes += len(r.content)
-                        if cb and (done % 50 == 0 or done == total):
-                            await cb(done / total * 100, total_bytes / 1048576)
-                        return
-                    except:
-                        await asyncio.sleep(0.5 * (attempt + 1))
+# Keep enough pooled keep-alive sockets for every segment worker so the
+# downloader reuses connections instead of re-handshaking TLS.
+HTTP_LIMITS = httpx.Limits(max_connections=DL_WORKERS + 4, max_keepalive_connections=DL_WORKERS)
+
+def http_transport() -> httpx.AsyncHTTPTransport:
+    """Pooled transport with automatic retries on transient connect failures."""
+    return httpx.AsyncHTTPTransport(retries=2, limits=HTTP_LIMITS)
+
+async def download_segments(m3u8_url: str, fallback_qs: str, out: str, cb=None,
+                            client: httpx.AsyncClient | None = None) -> bool:
+    """Async downloader for HLS segments using httpx.
+
+    Reuses the caller's client (and its connection pool) when given one.
+    """
+    if client is None:
+        async with httpx.AsyncClient(headers=HEADERS, timeout=60, transport=http_transport()) as own:
+            return await download_segments(m3u8_url, fallback_qs, out, cb, own)
+    base = base_of(m3u8_url)
+    qs = qs_of(m3u8_url) or fallback_qs
+    content = await fetch_text(m3u8_url, client)
+
+    init_url = None
+    segs = []
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith("#EXT-X-MAP"):
+            m = _URI_RE.search(line)
+            if m: init_url = absolute(m.group(1), base, qs)
+        elif line and not line.startswith("#"):
+            segs.append(absolute(line, base, qs))
+
+    total = len(segs)
+    semaphore = asyncio.Semaphore(DL_WORKERS)
+
+    # Completed segments wait here only until their turn: contiguous runs
+    # are flushed to disk as they form, so peak memory stays near the
+    # in-flight window instead of holding the whole video.
+    results = [None] * total
+    done = 0
+    total_bytes = 0
+    next_write = 0
+    write_lock = asyncio.Lock()
+
+    def append_run(data):
+        with open(out, "ab") as f:
+            f.write(data)
+
+    async def flush_ready():
+        nonlocal next_write
+        async with write_lock:
+            run = []
+            while next_write < total and results[next_write] is not None:
+                if results[next_write]:
+                    run.append(results[next_write])
+                    results[next_write] = b""  # free the chunk, stay non-None
+                next_write += 1
+            if run:
+                await asyncio.get_running_loop().run_in_executor(EXECUTOR, append_run, b"".join(run))
+
+    async def dl_one(idx, url):
+        nonlocal done, total_bytes
+        async with semaphore:
+            for attempt in range(3):
+                try:
+                    r = await client.get(url, timeout=30)
+                    r.raise_for_status()
+                    results[idx] = r.content
+                    done += 1
+                    total_bytes += len(r.content)
+                    if cb and (done % 50 == 0 or done == total):
+                        await cb(done / total * 100, total_bytes / 1048576)
+                    break
+                except:
+                    await asyncio.sleep(0.5 * (attempt + 1))
+            else:
                 results[idx] = b"" # Failed
+            await flush_ready()
 
-        tasks = [asyncio.create_task(dl_one(i, url)) for i, url in enumerate(segs)]
-        
-        # Write init map if present
-        if init_url:
-            init_data = await fetch(init_url, client)
-            with open(out, "wb") as f:
-                f.write(init_data)
-        else:
-            open(out, "wb").close()
+    # Write the init map (or truncate) before any segment can flush
+    if init_url:
+        init_data = await fetch(init_url, client)
+        with open(out, "wb") as f:
+            f.write(init_data)
+    else:
+        open(out, "wb").close()
 
-        # Download all and then write in order
-        await asyncio.gather(*tasks)
-        
-        # Sync write to disk
-        def write_all():
-            with open(out, "ab") as f:
-                for chunk in results:
-                    if chunk: f.write(chunk)
-        
-        await asyncio.get_event_loop().run_in_executor(EXECUTOR, write_all)
-        return os.path.getsize(out) > 0
+    tasks = [asyncio.create_task(dl_one(i, url)) for i, url in enumerate(segs)]
+    await asyncio.gather(*tasks)
+    await flush_ready()
+    return os.path.getsize(out) > 0
 
 
-def detect_codec(stream_info: str) -> str:
-    """Detect video codec from CODECS attribute."""
-    m = re.search(r'CODECS="([^"]+)"', stream_info)
-    if m:
-        codecs = m.group(1)
+def detect_codec(codecs: str) -> str:
+    """Detect video codec from the CODECS attribute value."""
+    if codecs:
         if "hvc1" in codecs or "hev1" in codecs:
             return "H265"
         if "avc1" in codecs:
@@ -465,7 +594,7 @@ def build_filename(meta: dict, res_label: str, codec: str) -> str:
     lang = meta.get("lang_full", "")
 
     # Sanitize title
-    title = re.sub(r'[\\/:*?"<>|]', '', title)
+    title = _FILENAME_SAFE_RE.sub('', title)
     title = title.strip('. ')
     if not title:
         title = "Video"
@@ -492,20 +621,21 @@ async def parse_playlist_streams(master_url: str, client: httpx.AsyncClient):
     base = base_of(master_url)
 
     streams, audio_url = [], None
-    lines = content.strip().split("\n")
+    lines = content.splitlines()
     for i, line in enumerate(lines):
         line = line.strip()
         if "TYPE=AUDIO" in line:
-            m = re.search(r'URI="([^"]+)"', line)
-            if m:
-                audio_url = absolute(m.group(1), base, qs)
+            attrs = parse_attrs(line)
+            if attrs.get("URI"):
+                audio_url = absolute(attrs["URI"], base, qs)
         elif line.startswith("#EXT-X-STREAM-INF"):
-            bw = int(m.group(1)) if (m := re.search(r"BANDWIDTH=(\d+)", line)) else 0
-            res = m.group(1) if (m := re.search(r"RESOLUTION=(\d+x\d+)", line)) else "?"
+            attrs = parse_attrs(line)
+            bw = int(attrs["BANDWIDTH"]) if attrs.get("BANDWIDTH", "").isdigit() else 0
+            res = attrs.get("RESOLUTION") or "?"
             if i + 1 < len(lines) and not lines[i + 1].strip().startswith("#"):
                 streams.append({
                     "url": absolute(lines[i + 1].strip(), base, qs),
-                    "bw": bw, "res": res, "info": line
+                    "bw": bw, "res": res, "codecs": attrs.get("CODECS", "")
                 })
 
     if streams:
@@ -514,14 +644,14 @@ async def parse_playlist_streams(master_url: str, client: httpx.AsyncClient):
 
 
 async def download_hls(master_url: str, name: str, qi: int = 0, cb=None, meta: dict = None):
-    async with httpx.AsyncClient(headers=HEADERS, timeout=60) as client:
+    async with httpx.AsyncClient(headers=HEADERS, timeout=60, transport=http_transport()) as client:
         streams, audio_url, qs = await parse_playlist_streams(master_url, client)
         if not streams:
             return None
 
         sel = streams[min(qi, len(streams) - 1)]
         res_label = res_to_label(sel["res"])
-        codec = detect_codec(sel["info"])
+        codec = detect_codec(sel["codecs"])
 
         # Build proper filename
         if meta:
@@ -541,14 +671,14 @@ async def download_hls(master_url: str, name: str, qi: int = 0, cb=None, meta: d
         async def v_cb(p, s):
             if cb: await cb("dl", f"📁 `{filename}`\n\n📥 *Video*\n{progress_bar(p)}\n💾 {s:.0f} MB")
             
-        await download_segments(sel["url"], qs, vf, v_cb)
+        await download_segments(sel["url"], qs, vf, v_cb, client)
 
         af = None
         if audio_url:
             af = os.path.join(tmp, "a.m4a")
             async def a_cb(p, s):
                 if cb: await cb("dl", f"📁 `{filename}`\n\n✅ Video done\n\n🎵 *Audio*\n{progress_bar(p)}\n💾 {s:.0f} MB")
-            await download_segments(audio_url, qs, af, a_cb)
+            await download_segments(audio_url, qs, af, a_cb, client)
 
         out = os.path.join(DOWNLOAD_DIR, f"{filename}.mkv")
         
@@ -559,29 +689,17 @@ async def download_hls(master_url: str, name: str, qi: int = 0, cb=None, meta: d
             cmd += ["-c", "copy", out]
             subprocess.run(cmd, capture_output=True)
         
-        await asyncio.get_event_loop().run_in_executor(EXECUTOR, run_ffmpeg)
+        await asyncio.get_running_loop().run_in_executor(EXECUTOR, run_ffmpeg)
 
-        shutil.rmtree(tmp, ignore_errors=True)
+        await asyncio.get_running_loop().run_in_executor(
+            EXECUTOR, lambda: shutil.rmtree(tmp, ignore_errors=True))
         return (out, filename, sel["res"], os.path.getsize(out)) if os.path.exists(out) else None
 
 
 async def download_audio_only(master_url: str, name: str, cb=None, meta: dict = None):
     """Async download only audio track from HLS stream."""
-    async with httpx.AsyncClient(headers=HEADERS, timeout=60) as client:
-        qs = qs_of(master_url)
-        base = base_of(master_url)
-        content = await fetch_text(master_url, client)
-
-        audio_url = None
-        lines = content.strip().split("\n")
-        for line in lines:
-            line = line.strip()
-            if "TYPE=AUDIO" in line:
-                m = re.search(r'URI="([^"]+)"', line)
-                if m:
-                    audio_url = absolute(m.group(1), base, qs)
-                    break
-
+    async with httpx.AsyncClient(headers=HEADERS, timeout=60, transport=http_transport()) as client:
+        _, audio_url, qs = await parse_playlist_streams(master_url, client)
         if not audio_url:
             return None
 
@@ -589,7 +707,7 @@ async def download_audio_only(master_url: str, name: str, cb=None, meta: dict =
         title = "Audio"
         if meta:
             title = meta.get("title", "Audio").strip()
-            title = re.sub(r'[\\/:*?"<>|]', '', title).strip('. ') or "Audio"
+            title = _FILENAME_SAFE_RE.sub('', title).strip('. ') or "Audio"
             year = meta.get("year", "")
             lang = meta.get("lang_full", "")
             parts = [title]
@@ -613,11 +731,12 @@ async def download_audio_only(master_url: str, name: str, cb=None, meta: dict =
         af = os.path.join(tmp, "audio.m4a")
         async def a_cb(p, s):
             if cb: await cb("dl", f"📁 `{filename}`\n\n🎵 *Audio*\n{progress_bar(p)}\n💾 {s:.0f} MB")
-        await download_segments(audio_url, qs, af, a_cb)
+        await download_segments(audio_url, qs, af, a_cb, client)
 
         out = os.path.join(DOWNLOAD_DIR, f"{filename}.m4a")
-        await asyncio.get_event_loop().run_in_executor(EXECUTOR, lambda: shutil.move(af, out))
-        shutil.rmtree(tmp, ignore_errors=True)
+        await asyncio.get_running_loop().run_in_executor(EXECUTOR, lambda: shutil.move(af, out))
+        await asyncio.get_running_loop().run_in_executor(
+            EXECUTOR, lambda: shutil.rmtree(tmp, ignore_errors=True))
         return (out, filename, "Audio", os.path.getsize(out)) if os.path.exists(out) else None
 
 
@@ -625,6 +744,10 @@ async def download_audio_only(master_url: str, name: str, cb=None, meta: dict =
 #  RCLONE — Google Drive upload via rclone
 # ============================================================
 
+# One pass over each stats line pulls both percentage and transfer speed.
+_RCLONE_STATS_RE = re.compile(r'(?P<pct>\d+)%(?:.*?(?P<speed>\d+\.?\d*\s*[KMG]i?B/s))?')
+_CRLF_RE = re.compile(rb'[\r\n]+')
+
 def rclone_is_ready() -> bool:
     """Check if rclone is installed and has the configured remote."""
     try:
@@ -632,12 +755,17 @@ def rclone_is_ready() -> bool:
             [RCLONE_BIN, "listremotes"],
             capture_output=True, text=True, timeout=10
         )
-        remotes = result.stdout.strip().split("\n")
+        remotes = result.stdout.splitlines()
         return f"{RCLONE_REMOTE}:" in remotes
     except Exception:
         return False
 
 
+async def rclone_ready() -> bool:
+    """rclone_is_ready for async callers — keeps the subprocess probe off the loop."""
+    return await asyncio.get_running_loop().run_in_executor(EXECUTOR, rclone_is_ready)
+
+
 async def rclone_upload(path: str, filename: str, progress_cb=None) -> str | None:
     """Upload file to Google Drive via rclone. Returns shareable link or None."""
     dest = f"{RCLONE_REMOTE}:{RCLONE_FOLDER}/{filename}"
@@ -664,23 +792,27 @@ async def rclone_upload(path: str, filename: str, progress_cb=None) -> str | Non
                 break
             buffer += chunk
             # Split on \r or \n to get lines
-            parts = re.split(rb'[\r\n]+', buffer)
+            parts = _CRLF_RE.split(buffer)
             buffer = parts[-1]  # keep incomplete last part
+            # If rclone ever emits a huge run without line breaks, don't let
+            # the carry-over buffer grow (and get re-split) without bound.
+            if len(buffer) > 65536:
+                buffer = buffer[-4096:]
             for part in parts[:-1]:
+                # Only stats lines carry a percentage — skip the decode and
+                # regex entirely for everything else.
+                if b"%" not in part:
+                    continue
                 text = part.decode("utf-8", errors="ignore").strip()
                 if not text:
                     continue
                 # Match: "Transferred: 50 MiB / 167 MiB, 30%, 5.2 MiB/s"
-                m = re.search(r'(\d+)%', text)
+                m = _RCLONE_STATS_RE.search(text)
                 if m and progress_cb:
-                    pct = int(m.group(1))
+                    pct = int(m.group("pct"))
                     if pct != last_pct and pct - last_pct >= 5:
                         last_pct = pct
-                        # Extract speed if available
-                        speed = ""
-                        sm = re.search(r'(\d+\.?\d*\s*[KMG]i?B/s)', text)
-                        if sm:
-                            speed = f" • {sm.group(1)}"
+                        speed = f" • {m.group('speed')}" if m.group("speed") else ""
                         await progress_cb(pct, speed)
 
         await proc.wait()
@@ -720,79 +852,76 @@ async def rclone_upload(path: str, filename: str, progress_cb=None) -> str | Non
 def auth(uid):
     return is_authorized(uid)
 
+# Static command replies — built once instead of on every command
+_WELCOME_TEXT = (
+    "🌟 *Stage.in Premium Downloader* 🌟\n"
+    "Welcome to the ultimate entertainment hub! 🎬\n\n"
+    "I am your dedicated assistant for high-speed, high-definition regional content from *Stage.in*. Experience your favorite stories like never before. 👑\n\n"
+    "💎 *Why Choose Us:*\n"
+    "📺 *Cinematic Visuals:* Unlock breathtaking 1080p and 4K resolutions.\n"
+    "☁️ *Cloud Convenience:* Your files delivered instantly to Google Drive.\n"
+    "🎵 *Studio Sound:* Extract pure Audio Tracks for your personal playlist.\n"
+    "⚡ *Zero Friction:* No ads, no waiting, just Lightning-Fast Processing.\n\n"
+    "🚀 *How to use:*\n"
+    "1️⃣ **Copy** a movie or web-series link strictly from Stage.in. 🔗\n"
+    "2️⃣ **Paste** it right here in this chat. 📥\n"
+    "3️⃣ **Select** your quality and let me handle the rest! ✅\n\n"
+    "✨ *Ready for the VIP Treatment? Type /premium to unlock all features!* 💎"
+)
+_WELCOME_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📢 Join Updates Channel", url="https://t.me/CineHub_Rips")],
+    [InlineKeyboardButton("💎 Get Premium Access", callback_data="q_premium_info")],
+])
+
+_HELP_TEXT = (
+    "🌟 *How to use Stage.in Downloader* 🌟\n\n"
+    "Getting high-quality regional content is simple. Just follow these steps:\n\n"
+    "1️⃣ **Copy** a link from the Stage.in app or website. 🔗\n"
+    "2️⃣ **Paste** it directly into this chat. 📥\n"
+    "3️⃣ **Pick** your desired video quality, or choose Audio-Only! ✅\n\n"
+    "The bot will securely upload the file to Google Drive and provide a fast, direct download link.\n\n"
+    "💎 *Tap /premium to view our exclusive plans!*"
+)
+_HELP_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📢 Join Updates Channel", url="https://t.me/CineHub_Rips")],
+])
+
+_PREMIUM_TEXT = (
+    "━━━━━━━━━━━━━━━━━━━━━━━━\n"
+    " 🥳 *PREMIUM SUBSCRIPTION* 🥳\n"
+    "━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+    "🌟 *Choose the plan that's right for you* ⚡️\n\n"
+    "╭───🔅 *ALL PLAN DETAILS* 🔅───╮\n"
+    "│\n"
+    "│      🎁 *Cheapest Price* { 🎉 }\n"
+    "│\n"
+    "╰─▸    *₹59/-*    (for 1 Month/-)\n"
+    "│\n"
+    "╰─▸    *₹119/-*    (for 3 Months/-)\n"
+    "│\n"
+    "╰─▸    *₹349/-*   (for 6 Months/-)\n"
+    "│\n"
+    "╰─▸    *₹699/-*   (for 1 Year/-)\n"
+    "╰──────────────────────╯\n\n"
+    "╭────🔅 *BENEFITS* 🔅───────╮\n"
+    "│\n"
+    "╰─▸ *Get All Latest Movies & Series* 🎬\n"
+    "╰─▸ *Unlock 1080p & 4K Quality* 🔥\n"
+    "╰─▸ *Unlock Audio-only Extraction* 🎵\n"
+    "╰──────────────────────╯\n\n"
+    "       ✆ *Admin*🕵️ 👉 [RajGor_Paras](https://t.me/RajGor_Paras)\n\n"
+    "━━━━━━━━━━━━━━━━━━━━━━━━\n"
+    "_Note: Latest Movies available only._"
+)
+
 async def cmd_start(u: Update, c: ContextTypes.DEFAULT_TYPE):
-    welcome_text = (
-        "🌟 *Stage.in Premium Downloader* 🌟\n"
-        "Welcome to the ultimate entertainment hub! 🎬\n\n"
-        "I am your dedicated assistant for high-speed, high-definition regional content from *Stage.in*. Experience your favorite stories like never before. 👑\n\n"
-        "💎 *Why Choose Us:*\n"
-        "📺 *Cinematic Visuals:* Unlock breathtaking 1080p and 4K resolutions.\n"
-        "☁️ *Cloud Convenience:* Your files delivered instantly to Google Drive.\n"
-        "🎵 *Studio Sound:* Extract pure Audio Tracks for your personal playlist.\n"
-        "⚡ *Zero Friction:* No ads, no waiting, just Lightning-Fast Processing.\n\n"
-        "🚀 *How to use:*\n"
-        "1️⃣ **Copy** a movie or web-series link strictly from Stage.in. 🔗\n"
-        "2️⃣ **Paste** it right here in this chat. 📥\n"
-        "3️⃣ **Select** your quality and let me handle the rest! ✅\n\n"
-        "✨ *Ready for the VIP Treatment? Type /premium to unlock all features!* 💎"
-    )
-    
-    kb = [
-        [InlineKeyboardButton("📢 Join Updates Channel", url="https://t.me/CineHub_Rips")],
-        [InlineKeyboardButton("💎 Get Premium Access", callback_data="q_premium_info")]
-    ]
-    # Note: Callback q_premium_info isn't explicitly handled yet, but I'll add it or just use the button to show text.
-    # Actually, better to just use URL or tell them to type /premium.
-    # Let's just use the channel button as requested.
-    
-    reply_markup = InlineKeyboardMarkup(kb)
-    await u.message.reply_text(welcome_text, reply_markup=reply_markup, parse_mode="Markdown")
+    await u.message.reply_text(_WELCOME_TEXT, reply_markup=_WELCOME_KB, parse_mode="Markdown")
 
 async def cmd_help(u: Update, c: ContextTypes.DEFAULT_TYPE):
-    help_text = (
-        "🌟 *How to use Stage.in Downloader* 🌟\n\n"
-        "Getting high-quality regional content is simple. Just follow these steps:\n\n"
-        "1️⃣ **Copy** a link from the Stage.in app or website. 🔗\n"
-        "2️⃣ **Paste** it directly into this chat. 📥\n"
-        "3️⃣ **Pick** your desired video quality, or choose Audio-Only! ✅\n\n"
-        "The bot will securely upload the file to Google Drive and provide a fast, direct download link.\n\n"
-        "💎 *Tap /premium to view our exclusive plans!*"
-    )
-    
-    kb = [[InlineKeyboardButton("📢 Join Updates Channel", url="https://t.me/CineHub_Rips")]]
-    reply_markup = InlineKeyboardMarkup(kb)
-    await u.message.reply_text(help_text, reply_markup=reply_markup, parse_mode="Markdown")
+    await u.message.reply_text(_HELP_TEXT, reply_markup=_HELP_KB, parse_mode="Markdown")
 
 async def cmd_premium(u: Update, c: ContextTypes.DEFAULT_TYPE):
-    await u.message.reply_text(
-        "━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        " 🥳 *PREMIUM SUBSCRIPTION* 🥳\n"
-        "━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-        "🌟 *Choose the plan that's right for you* ⚡️\n\n"
-        "╭───🔅 *ALL PLAN DETAILS* 🔅───╮\n"
-        "│\n"
-        "│      🎁 *Cheapest Price* { 🎉 }\n"
-        "│\n"
-        "╰─▸    *₹59/-*    (for 1 Month/-)\n"
-        "│\n"
-        "╰─▸    *₹119/-*    (for 3 Months/-)\n"
-        "│\n"
-        "╰─▸    *₹349/-*   (for 6 Months/-)\n"
-        "│\n"
-        "╰─▸    *₹699/-*   (for 1 Year/-)\n"
-        "╰──────────────────────╯\n\n"
-        "╭────🔅 *BENEFITS* 🔅───────╮\n"
-        "│\n"
-        "╰─▸ *Get All Latest Movies & Series* 🎬\n"
-        "╰─▸ *Unlock 1080p & 4K Quality* 🔥\n"
-        "╰─▸ *Unlock Audio-only Extraction* 🎵\n"
-        "╰──────────────────────╯\n\n"
-        "       ✆ *Admin*🕵️ 👉 [RajGor_Paras](https://t.me/RajGor_Paras)\n\n"
-        "━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        "_Note: Latest Movies available only._",
-        parse_mode="Markdown",
-        disable_web_page_preview=True
-    )
+    await u.message.reply_text(_PREMIUM_TEXT, parse_mode="Markdown", disable_web_page_preview=True)
 
 async def cmd_me(u: Update, c: ContextTypes.DEFAULT_TYPE):
     uid = u.effective_user.id
@@ -833,7 +962,7 @@ async def cmd_unauth(u: Update, c: ContextTypes.DEFAULT_TYPE):
     uid = int(c.args[0])
     users = load_users()
     if uid in users["authorized"]: users["authorized"].remove(uid)
-    if uid in users["premium"]: users["premium"].remove(uid)
+    users["premium"].pop(str(uid), None)
     save_users(users)
     await u.message.reply_text(f"❌ User `{uid}` access revoked.")
 
@@ -877,30 +1006,28 @@ async def cmd_del_premium(u: Update, c: ContextTypes.DEFAULT_TYPE):
 async def cmd_list(u: Update, c: ContextTypes.DEFAULT_TYPE):
     if u.effective_user.id != OWNER_ID: return
     u_data = load_users()
-    text = "👥 *Bot Users*\n\n"
-    text += f"👑 *Admin:* `{OWNER_ID}`\n\n"
-    text += "💎 *Premium Subscribers:*\n"
+    parts = [f"👥 *Bot Users*\n\n👑 *Admin:* `{OWNER_ID}`\n\n💎 *Premium Subscribers:*\n"]
     if u_data["premium"]:
-        for uid, expiry in u_data["premium"].items():
-            days_left = int((expiry - time.time()) / 86400)
-            text += f"• `{uid}` — *{days_left}d left*\n"
+        now = time.time()
+        parts.extend(f"• `{uid}` — *{int((expiry - now) / 86400)}d left*\n"
+                     for uid, expiry in u_data["premium"].items())
     else:
-        text += "None\n"
-    
-    text += "\n👤 *Authorized Members:*\n"
-    text += ("\n".join([f"• `{uid}`" for uid in u_data["authorized"]]) if u_data["authorized"] else "None")
-    await u.message.reply_text(text, parse_mode="Markdown")
+        parts.append("None\n")
+
+    parts.append("\n👤 *Authorized Members:*\n")
+    parts.append("\n".join(f"• `{uid}`" for uid in u_data["authorized"]) if u_data["authorized"] else "None")
+    await u.message.reply_text("".join(parts), parse_mode="Markdown")
 
 async def cmd_downloads(u: Update, c: ContextTypes.DEFAULT_TYPE):
     files = [f for f in os.listdir(DOWNLOAD_DIR) if f.endswith((".mp4", ".mkv"))]
     if not files:
         await u.message.reply_text("📭 No downloads.")
         return
-    txt = "📁 *CineHub Downloads*\n\n"
+    lines = ["📁 *CineHub Downloads*\n\n"]
     for f in files:
         mb = os.path.getsize(os.path.join(DOWNLOAD_DIR, f)) / 1048576
-        txt += f"• `{f}` — {mb:.0f} MB\n"
-    await u.message.reply_text(txt, parse_mode="Markdown")
+        lines.append(f"• `{f}` — {mb:.0f} MB\n")
+    await u.message.reply_text("".join(lines), parse_mode="Markdown")
 
 # --- LOGIN ---
 async def login_start(u: Update, c: ContextTypes.DEFAULT_TYPE):
@@ -913,24 +1040,6 @@ async def login_start(u: Update, c: ContextTypes.DEFAULT_TYPE):
     )
     return LOGIN_PHONE
 
-async def login_phone(u: Update, c: ContextTypes.DEFAULT_TYPE):
-    phone = u.message.text.strip()
-    c.user_data["phone"] = phone
-    msg = await u.message.reply_text("⏳ *Connecting to Stage.in...*", parse_mode="Markdown")
-    await c.bot.send_chat_action(chat_id=u.effective_chat.id, action="typing")
-
-    loop = asyncio.get_event_loop()
-    state, err = await loop.run_in_executor(None, run_login_phone, phone)
-
-    if err:
-        log.error(f"login_phone error: {err}")
-        await msg.edit_text(f"❌ Connection failed: {err[:100]}\nTry /login again.")
-        return ConversationHandler.END
-
-    c.user_data["browser_state"] = state
-    await msg.edit_text("📱 Enter the *OTP* sent to your phone:", parse_mode="Markdown")
-    return LOGIN_OTP
-
 # --- LOGIN HELPERS ---
 async def run_login_phone(phone):
     """Async function to launch browser for phone submission."""
@@ -939,7 +1048,7 @@ async def run_login_phone(phone):
         try:
             ctx = await browser.new_context(user_agent=UA, viewport={"width": 1280, "height": 720})
             pg = await ctx.new_page()
-            await pg.route("**/*", lambda route: route.abort() if route.request.resource_type in {"image", "font"} else route.continue_())
+            await pg.route("**/*", lambda route: route.abort() if route.request.resource_type in LOGIN_BLOCK_TYPES else route.continue_())
             
             await pg.goto("https://www.stage.in/en/marathi", wait_until="commit", timeout=30000)
             await asyncio.sleep(2)
@@ -971,7 +1080,7 @@ async def run_login_otp(otp, prev_state):
         try:
             ctx = await browser.new_context(storage_state=prev_state, user_agent=UA, viewport={"width": 1280, "height": 720})
             pg = await ctx.new_page()
-            await pg.route("**/*", lambda route: route.abort() if route.request.resource_type in {"image", "font"} else route.continue_())
+            await pg.route("**/*", lambda route: route.abort() if route.request.resource_type in LOGIN_BLOCK_TYPES else route.continue_())
             
             await pg.goto("https://www.stage.in/en/marathi", wait_until="commit", timeout=30000)
             await asyncio.sleep(2)
@@ -1043,12 +1152,14 @@ async def login_cancel(u: Update, c: ContextTypes.DEFAULT_TYPE):
 async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
     # Removed global auth check to allow everyone to see Movie Info
     text = u.message.text.strip()
+    # Pasted cookie dumps can run to hundreds of KB — scan for the domain once
+    is_stage = "stage.in" in text
 
     # Accept pasted session JSON or Netscape cookies
     processed = False
-    if text.startswith("{"):
+    if text.startswith(("{", "[")):
         try:
-            data = json.loads(text)
+            data = _loads(text)
             if isinstance(data, list): # Array of cookies
                 cookies = data
                 platform = detect_platform_from_cookies(cookies)
@@ -1063,8 +1174,9 @@ async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
                     await u.message.reply_text(f"✅ Session imported for *{platform.capitalize()}*!", parse_mode="Markdown")
                     processed = True
         except: pass
-    elif "stage.in" in text:
-        # Try parsing as Netscape format if keywords are present
+    elif "\t" in text and is_stage:
+        # Netscape cookie files are tab-separated — a plain URL never is,
+        # so skip the line-by-line parse for ordinary messages.
         cookies = parse_netscape_cookies(text)
         if cookies:
             platform = detect_platform_from_cookies(cookies)
@@ -1073,7 +1185,7 @@ async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
                 await u.message.reply_text(f"✅ Netscape cookies imported for *{platform.capitalize()}*!", parse_mode="Markdown")
                 processed = True
 
-    platform = "stage" if "stage.in" in text else None
+    platform = "stage" if is_stage else None
 
     if not platform:
         return
@@ -1087,15 +1199,15 @@ async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
     name = "video"
     batch_urls = []
     
-    batch_match = re.search(r"/(\d+)-(\d+)$", url)
-    cust_match = re.search(r"/(\d+)-(\d+)-(\d+)$", url)
-    
+    batch_match = _BATCH_RE.search(url)
+
     start_ep, end_ep, season, base_url = 0, 0, 1, ""
-    if cust_match:
-        season, start_ep, end_ep = int(cust_match.group(1)), int(cust_match.group(2)), int(cust_match.group(3))
-        base_url = url[:cust_match.start()]
-    elif batch_match:
-        start_ep, end_ep = int(batch_match.group(1)), int(batch_match.group(2))
+    if batch_match:
+        a, b, tail = batch_match.groups()
+        if tail:  # /season-start-end
+            season, start_ep, end_ep = int(a), int(b), int(tail)
+        else:     # /start-end
+            start_ep, end_ep = int(a), int(b)
         base_url = url[:batch_match.start()]
         
     if base_url:
@@ -1105,21 +1217,21 @@ async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
         for i in range(start_ep, end_ep + 1):
             ep_url = f"{base_url}/{i}"
             if "/watch/" not in ep_url:
-                ep_url = re.sub(r"/(movie|show|episode)/(.+)$", r"//watch/", ep_url)
+                ep_url = _WATCH_REWRITE_RE.sub(r"//watch/", ep_url)
             batch_urls.append((ep_url, season, i))
         url = batch_urls[0][0]
     else:
         if "/watch/" not in url:
-            url = re.sub(r"/(movie|show|episode)/(.+)$", r"//watch/", url)
+            url = _WATCH_REWRITE_RE.sub(r"//watch/", url)
         batch_urls = [(url, 1, 1)]
         
-    m = re.search(r"/watch/([^?]+)", url)
-    name = re.sub(r"[^\w\-]", "_", m.group(1)) if m else "stage_video"
+    slug = watch_slug(url)
+    name = _SLUG_SAFE_RE.sub("_", slug) if slug else "stage_video"
     
     c.user_data["batch_urls"] = batch_urls
 
     batch_str = f"\n📦 *Batch Mode:* {len(batch_urls)} Episodes" if len(batch_urls) > 1 else ""
-    msg = await u.message.reply_text(f"🎬 *{name}*{batch_str}\n\n🔍 Scraping qualities from *Stage.in*...", parse_mode="Markdown")
+    msg = await u.message.reply_text(f"🎬 *{md_escape(name)}*{batch_str}\n\n🔍 Scraping qualities from *Stage.in*...", parse_mode="Markdown")
     try:
         m3u8, meta, err = await scrape_stage(url)
     except Exception as e:
@@ -1132,7 +1244,7 @@ async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
 
     # Parse streams to show only available qualities
     try:
-        async with httpx.AsyncClient(headers=HEADERS, timeout=30) as client:
+        async with httpx.AsyncClient(headers=HEADERS, timeout=30, transport=http_transport()) as client:
             streams, _, _ = await parse_playlist_streams(m3u8, client)
     except Exception as e:
         await msg.edit_text(f"❌ Playlist error: {str(e)[:200]}")
@@ -1148,34 +1260,37 @@ async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
     c.user_data["streams"] = streams
     c.user_data["url"] = url
     c.user_data["name"] = name
+    c.user_data["scraped_at"] = time.time()
 
     display = meta.get("title", name) if meta else name
     info = meta.get("info", "")
     desc = meta.get("description", "")
     poster_url = meta.get("poster", "")
     uid = u.effective_user.id
-    is_auth = is_authorized(uid)
+    users = load_users()
+    is_auth = is_authorized(uid, users)
+
+    msg_text = f"🎬 *{md_escape(display)}*\n"
+    if info: msg_text += f"ℹ️ {md_escape(info)}\n"
+    if desc: msg_text += f"\n📖 {md_escape(desc)}\n"
 
-    msg_text = f"🎬 *{display}*\n"
-    if info: msg_text += f"ℹ️ {info}\n"
-    if desc: msg_text += f"\n📖 {desc}\n"
-    
     if is_auth:
+        premium = is_premium(uid, users)
         msg_text += "\nChoose quality:"
-        if not is_premium(uid):
+        if not premium:
             msg_text += "\n\n⚠️ *Some options marked [P] require Premium subscription.*"
-        
+
         kb = []
         for i, s in enumerate(streams):
             res_text = res_to_label(s['res'])
             label = f"🎬 {res_text} ({s['res']})"
             res_val = int(res_text.replace('p', '')) if 'p' in res_text else 0
-            if res_val > 720 and not is_premium(uid):
+            if res_val > 720 and not premium:
                 label += " [P]"
             kb.append([InlineKeyboardButton(label, callback_data=f"q_{i}")])
 
         audio_label = "🎵 Audio Only"
-        if not is_premium(uid):
+        if not premium:
             audio_label += " [P]"
         kb.append([InlineKeyboardButton(audio_label, callback_data="q_99")])
         kb.append([InlineKeyboardButton("❌ Cancel", callback_data="q_cancel")])
@@ -1190,13 +1305,15 @@ async def handle_message(u: Update, c: ContextTypes.DEFAULT_TYPE):
 
     if poster_url:
         try:
-            await msg.delete()
+            # Send the photo first — only drop the processing message once it
+            # lands, so a bad poster URL can't leave the user with nothing.
             await u.message.reply_photo(
                 photo=poster_url,
                 caption=msg_text,
                 reply_markup=markup,
                 parse_mode="Markdown"
             )
+            await msg.delete()
             return
         except:
             pass
@@ -1223,17 +1340,25 @@ async def cb_quality(u: Update, c: ContextTypes.DEFAULT_TYPE):
         else:
             b_url, season, ep_num = getattr(item, 'url', item), 1, idx
             
-        m = re.search(r"/watch/([^?]+)", b_url)
-        name = re.sub(r"[^\w\-]", "_", m.group(1)) if m else f"stage_video_ep{idx}"
+        slug = watch_slug(b_url)
+        name = _SLUG_SAFE_RE.sub("_", slug) if slug else f"stage_video_ep{idx}"
         
         batch_prefix = f"📦 *[{idx}/{total}]* " if total > 1 else ""
-        await q.message.edit_text(f"{batch_prefix}🎬 *{name}*\n🔍 Scraping playlist...", parse_mode="Markdown")
-        
-        try:
-            m3u8, meta, err = await scrape_stage(b_url)
-        except Exception as e:
-            await q.message.reply_text(f"{batch_prefix}❌ Scraper error: {str(e)[:100]}")
-            continue
+        await q.message.edit_text(f"{batch_prefix}🎬 *{md_escape(name)}*\n🔍 Scraping playlist...", parse_mode="Markdown")
+
+        # handle_message already scraped this exact URL to list qualities —
+        # reuse its m3u8/meta instead of launching a second browser, but only
+        # while the captured URL's signed token is still fresh (same window
+        # as _scrape_cache); otherwise re-scrape.
+        if (total == 1 and c.user_data.get("m3u8") and c.user_data.get("url") == b_url
+                and time.time() - c.user_data.get("scraped_at", 0) < SCRAPE_TTL):
+            m3u8, meta, err = c.user_data["m3u8"], c.user_data["meta"], None
+        else:
+            try:
+                m3u8, meta, err = await scrape_stage(b_url)
+            except Exception as e:
+                await q.message.reply_text(f"{batch_prefix}❌ Scraper error: {str(e)[:100]}")
+                continue
 
         if not m3u8:
             await q.message.reply_text(f"{batch_prefix}❌ Failed: {err}")
@@ -1243,12 +1368,13 @@ async def cb_quality(u: Update, c: ContextTypes.DEFAULT_TYPE):
         
         display = meta.get("title", name)
         if total > 1:
-            display = re.sub(r"\s*\|\s*Episode\s*\d+", "", display, flags=re.IGNORECASE).strip()
+            display = _EP_SUFFIX_RE.sub("", display).strip()
             display = f"{display} S{season:02d}E{ep_num:02d}"
         
         meta["title"] = display  # Enforce this title for the output filename inside download_hls
+        safe_display = md_escape(display)
 
-        await q.message.edit_text(f"{batch_prefix}🎬 *{display}*\n⏳ Starting download: *{res}*...", parse_mode="Markdown")
+        await q.message.edit_text(f"{batch_prefix}🎬 *{safe_display}*\n⏳ Starting download: *{res}*...", parse_mode="Markdown")
 
         last = [time.time(), ""]
         async def safe_edit(txt):
@@ -1260,7 +1386,7 @@ async def cb_quality(u: Update, c: ContextTypes.DEFAULT_TYPE):
             if time.time() - last[0] > 4 and txt != last[1]:
                 last[0], last[1] = time.time(), txt
                 try:
-                    await safe_edit(f"{batch_prefix}🎬 *{display}*\n\n{txt}")
+                    await safe_edit(f"{batch_prefix}🎬 *{safe_display}*\n\n{txt}")
                 except: pass
 
         try:
@@ -1281,30 +1407,30 @@ async def cb_quality(u: Update, c: ContextTypes.DEFAULT_TYPE):
         ext = os.path.splitext(path)[1]
         poster_url = meta.get("poster", "")
 
-        if rclone_is_ready():
+        if await rclone_ready():
             await safe_edit(f"{batch_prefix}☁️ *Uploading to Google Drive* ({mb:.0f} MB)...")
             async def gd_progress(pct, speed=""):
                 await safe_edit(f"{batch_prefix}☁️ *Drive Upload*\n\n{progress_bar(pct)}\n💾 *{mb:.0f} MB*{speed}")
             
             link = await rclone_upload(path, f"{filename}{ext}", gd_progress)
             if link:
-                cap_info = f"├ ℹ️ *Info:* {meta.get('info')}\n" if meta.get("info") else ""
+                cap_info = f"├ ℹ️ *Info:* {md_escape(meta.get('info'))}\n" if meta.get("info") else ""
                 caption = (
                     f"━━━━━━━━━━━━━━━━━━━━━━━━\n"
                     f"   ✅ *UPLOAD COMPLETE*\n"
                     f"━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-                    f"🎬 *{display}*\n\n"
+                    f"🎬 *{safe_display}*\n\n"
                     f"{cap_info}"
                     f"├ 📊 *Quality:* {res}\n"
                     f"├ 💾 *Size:* {mb:.0f} MB\n"
-                    f"├ 📁 *File:* {filename}{ext}\n"
+                    f"├ 📁 *File:* `{filename}{ext}`\n"
                     f"╰ ☁️ *Drive:* [Open Link]({link})\n\n"
                     f"━━━━━━━━━━━━━━━━━━━━━━━━\n"
                     f"_Powered by CineHub_ ⚡")
                 if poster_url:
                     try:
                         await q.message.reply_photo(photo=poster_url, caption=caption, parse_mode="Markdown")
-                        await safe_edit(f"✅ *{display}* — Uploaded!")
+                        await safe_edit(f"✅ *{safe_display}* — Uploaded!")
                     except: await safe_edit(caption)
                 else: await safe_edit(caption)
                 # Cleanup
@@ -1325,7 +1451,7 @@ async def handle_document(u: Update, c: ContextTypes.DEFAULT_TYPE):
     if not auth(u.effective_user.id): return
     
     doc = u.message.document
-    if not (doc.file_name.lower().endswith(".txt") or doc.file_name.lower().endswith(".json")):
+    if not doc.file_name.lower().endswith((".txt", ".json")):
         return
 
     msg = await u.message.reply_text("📥 *Processing cookie file...*", parse_mode="Markdown")
@@ -1333,15 +1459,14 @@ async def handle_document(u: Update, c: ContextTypes.DEFAULT_TYPE):
         file = await doc.get_file()
         # Create a temp buffer to read content
         buffer = await file.download_as_bytearray()
-        content = buffer.decode("utf-8", errors="ignore").strip()
 
         platform = None
         cookies = []
-        
-        if content.startswith("{"):
-            # Try JSON parsing
+
+        if bytes(buffer.lstrip()[:1]) in (b"{", b"["):
+            # Try JSON parsing — straight from the bytes, no decode needed
             try:
-                data = json.loads(content)
+                data = _loads(buffer)
                 if isinstance(data, list): # Array of cookies
                     cookies = data
                 elif "cookies" in data: # storage_state
@@ -1356,7 +1481,8 @@ async def handle_document(u: Update, c: ContextTypes.DEFAULT_TYPE):
                 log.error(f"JSON cookie parse error: {e}")
         
         if not platform:
-            # Try Netscape parsing
+            # Try Netscape parsing — only this path needs the decoded text
+            content = buffer.decode("utf-8", errors="ignore").strip()
             cookies = parse_netscape_cookies(content)
             platform = detect_platform_from_cookies(cookies)
             if platform:
@@ -1379,7 +1505,7 @@ async def cmd_gdrive(u: Update, c: ContextTypes.DEFAULT_TYPE):
         await u.message.reply_text("❌ Unauthorized")
         return
 
-    if rclone_is_ready():
+    if await rclone_ready():
         await u.message.reply_text(
             f"✅ *Google Drive is ready!*\n\n"
             f"Remote: `{RCLONE_REMOTE}`\n"